@@ -1,143 +1,232 @@
 import sys
-import math
+import multiprocessing as mp
+from io import BytesIO
+import numpy as np
 from PIL import Image, ImageDraw
 import glob
-import os
 
-def render_frame(ppm_path, frame_idx, total_frames):
-    # 3D vertices (match test_parallel_torus.sv "High-Density Donut")
-    # 32 Threads (Phi) x 16 Steps (Theta) = 512 Vertices
-    # R = 16, r = 8
-    
-    vertices3d = []
-    edges = []
-    
-    PI = 3.1415926535
-    R_major = 16.0
-    r_minor = 8.0
-    
-    NUM_PHI = 32   # Threads
-    NUM_THETA = 16 # Inner Loop
-    
-    grid = [[None for _ in range(NUM_THETA)] for _ in range(NUM_PHI)]
-    
-    for i in range(NUM_PHI):
-        # phi = TID * (2^16 / 32)
-        phi = i * (2.0 * PI / 32.0)
-        
-        for j in range(NUM_THETA):
-            # theta = j * (2^16 / 16)
-            theta = j * (2.0 * PI / 16.0)
-            
-            # Parametric Torus
-            # x = (R + r*cos(theta)) * cos(phi)
-            # y = (R + r*cos(theta)) * sin(phi)
-            # z = r*sin(theta)
-            
-            x = (R_major + r_minor * math.cos(theta)) * math.cos(phi)
-            y = (R_major + r_minor * math.cos(theta)) * math.sin(phi)
-            z = r_minor * math.sin(theta)
-            
-            vertices3d.append((x, y, z))
-            grid[i][j] = len(vertices3d) - 1
-
-    # Generate Grid Edges
-    for i in range(NUM_PHI):
-        for j in range(NUM_THETA):
-            p1 = grid[i][j]
-            
-            # Connect along Theta (Ring)
-            p2 = grid[i][(j + 1) % NUM_THETA]
-            edges.append((p1, p2))
-            
-            # Connect along Phi (Tube)
-            p3 = grid[(i + 1) % NUM_PHI][j]
-            edges.append((p1, p3))
-    
-    # Diagonal Axis Rotation: Both X and Y rotate Clockwise
-    
-    # 1. Y-Axis: Clockwise
-    angle_y = -math.radians(frame_idx * 6.0)
-    cos_y, sin_y = math.cos(angle_y), math.sin(angle_y)
-    
-    # 2. X-Axis: Clockwise (Dynamic, same as Y)
-    angle_x = -math.radians(frame_idx * 6.0)
-    cos_x, sin_x = math.cos(angle_x), math.sin(angle_x)
+# Optional: imageio delegates GIF muxing to FFmpeg/pyav with threaded
+# encoding; fall back to Pillow's single-threaded writer when absent.
+try:
+    import imageio
+except ImportError:
+    imageio = None
+
+# Torus geometry (match test_parallel_torus.sv "High-Density Donut")
+# 32 Threads (Phi) x 16 Steps (Theta) = 512 Vertices
+# R = 16, r = 8
+# Frame-independent, so built once at import: the trig tables and the
+# vertex/edge sets used to be rebuilt per frame (512 cos/sin calls each).
+
+PI = 3.1415926535
+R_major = 16.0
+r_minor = 8.0
+
+NUM_PHI = 32   # Threads
+NUM_THETA = 16 # Inner Loop
 
-    projected_2d = []
-    for x, y, z in vertices3d:
-        # Y-axis rotation
+# phi = TID * (2^16 / 32), theta = j * (2^16 / 16)
+_phis = np.arange(NUM_PHI, dtype=np.float32) * np.float32(2.0 * PI / 32.0)
+_thetas = np.arange(NUM_THETA, dtype=np.float32) * np.float32(2.0 * PI / 16.0)
+
+# Parametric Torus, SoA layout: three flat float32 (512,) component arrays
+# instead of a list of tuples (half the footprint, SIMD-friendly ops)
+# x = (R + r*cos(theta)) * cos(phi)
+# y = (R + r*cos(theta)) * sin(phi)
+# z = r*sin(theta)
+_R_plus = (np.float32(R_major) + np.float32(r_minor) * np.cos(_thetas))[None, :]
+VX = (_R_plus * np.cos(_phis)[:, None]).ravel()
+VY = (_R_plus * np.sin(_phis)[:, None]).ravel()
+VZ = np.ascontiguousarray(
+    np.broadcast_to(np.float32(r_minor) * np.sin(_thetas),
+                    (NUM_PHI, NUM_THETA))).ravel()
+
+# Optional: Numba fuses the whole rotate+project batch into native code.
+# The NumPy fallback below is pure vector ops, so this only kicks in when
+# numba happens to be installed.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _rotate_project(X, Y, Z, cos_y, sin_y, cos_x, sin_x, dist, focal, off):
+    out = np.empty((X.shape[0], 2))
+    for i in range(X.shape[0]):
+        x, y, z = X[i], Y[i], Z[i]
         x1 = x * cos_y + z * sin_y
         z1 = z * cos_y - x * sin_y
-        
-        # X-axis rotation
         y2 = y * cos_x - z1 * sin_x
         z2 = z1 * cos_x + y * sin_x
-        
+        w = z2 + dist
+        if w == 0.0:
+            w = 1.0
+        out[i, 0] = x1 * focal / w + off
+        out[i, 1] = y2 * focal / w + off
+    return out
+
+if njit is not None:
+    _rotate_project = njit(cache=True, fastmath=True)(_rotate_project)
+
+# Grid edges as an index table, built with roll/interleave instead of the
+# old nested Python loops: each vertex connects along theta (ring) and
+# along phi (tube)
+_grid = np.arange(NUM_PHI * NUM_THETA, dtype=np.int32).reshape(NUM_PHI, NUM_THETA)
+EDGES = np.empty((2 * NUM_PHI * NUM_THETA, 2), dtype=np.int32)
+EDGES[0::2, 0] = _grid.ravel()
+EDGES[0::2, 1] = np.roll(_grid, -1, axis=1).ravel()  # Ring
+EDGES[1::2, 0] = _grid.ravel()
+EDGES[1::2, 1] = np.roll(_grid, -1, axis=0).ravel()  # Tube
+
+# Tiny fixed palette lets frames be drawn in 'P' mode, so the GIF writer
+# copies them through without palette quantization.
+# 0: background, 1: wireframe reference, 2: rendered pixels
+PALETTE = [40, 40, 40, 100, 100, 100, 255, 255, 255] + [0, 0, 0] * 253
+
+# Dot + halo stamp rasterized once at import: render_frame pastes palette
+# index 2 through this mask instead of issuing two ellipse draws per pixel.
+STAMP_RADIUS = 3
+
+def _build_stamp_mask():
+    size = 2 * STAMP_RADIUS + 1
+    m = Image.new('1', (size, size), 0)
+    d = ImageDraw.Draw(m)
+    d.ellipse([0, 0, size - 1, size - 1], outline=1)  # faint halo ring
+    d.ellipse([2, 2, size - 3, size - 3], fill=1)     # solid dot
+    return m
+
+STAMP_MASK = _build_stamp_mask()
+
+# Cached (header_bytes, width, height): every frame of a run shares the same
+# header, so after the first parse we only prefix-match the raw bytes.
+_header_cache = None
+
+def _read_mask(ppm_path):
+    global _header_cache
+    # A missing frame is reported by open() itself -- no separate stat call
+    try:
+        with open(ppm_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if _header_cache and data.startswith(_header_cache[0]):
+        header, width, height, magic = _header_cache
+    else:
+        # Handle PPM comments if present, though TB doesn't generate them
+        # Basic robust header parsing: skip comments, note the magic, the
+        # first remaining line carries the dimensions
+        offset = 0
+        fields = []
+        magic = b'P1'
+        while len(fields) < 2:
+            end = data.find(b'\n', offset)
+            if end < 0:
+                return None
+            line = data[offset:end].strip()
+            offset = end + 1
+            if line.startswith(b'#'):
+                continue
+            if line in (b'P1', b'P4'):
+                magic = line
+                continue
+            fields = line.split()
+        width, height = int(fields[0]), int(fields[1])
+        header = data[:offset]
+        _header_cache = (header, width, height, magic)
+    body = data[len(header):]
+    if magic == b'P4':
+        # Packed-bit binary fast path; each row is padded to a whole byte.
+        # No comment filtering here: the raw body may contain 0x23 bytes.
+        rows = np.frombuffer(body, dtype=np.uint8).reshape(height, (width + 7) // 8)
+        bits = np.unpackbits(rows, axis=1)[:, :width]
+        return bits, width, height
+    if b'#' in body:  # rare: comment lines inside the data section
+        body = b'\n'.join(l for l in body.split(b'\n')
+                          if not l.lstrip().startswith(b'#'))
+    # P1 data is pure '0'/'1' digits: drop whitespace at byte level and
+    # subtract ord('0') -- no tokenization or per-value int() casts.
+    bits = np.frombuffer(body.translate(None, b' \t\r\n'),
+                         dtype=np.uint8) - ord(b'0')
+    return bits.reshape(height, width), width, height
+
+# Pristine background frame, built once per frame size: Image.copy is a
+# single C memcpy, cheaper than re-filling a fresh Image.new every frame.
+_bg_template = None
+
+def _new_frame(size):
+    global _bg_template
+    if _bg_template is None or _bg_template.size != size:
+        img = Image.new('P', size, 0)
+        img.putpalette(PALETTE)
+        _bg_template = img
+    return _bg_template.copy()
+
+def render_frame(ppm_path, cos_r, sin_r):
+    # Diagonal Axis Rotation: Both X and Y rotate Clockwise by the same
+    # angle, whose trig arrives precomputed from create_animation (one
+    # vectorized np.cos/np.sin per run)
+    cos_y, sin_y = cos_r, sin_r
+    cos_x, sin_x = cos_r, sin_r
+
+    # Rotate and project all 512 vertices in one batch (JIT-compiled when
+    # numba is present, otherwise a matmul plus vectorized perspective divide)
+    dist = 128
+    focal = 128
+    if njit is not None:
+        projected_2d = _rotate_project(VX, VY, VZ, cos_y, sin_y, cos_x, sin_x,
+                                       float(dist), float(focal), 32.0)
+    else:
+        # Componentwise on the SoA arrays: Y-axis then X-axis rotation
+        x1 = VX * cos_y + VZ * sin_y
+        z1 = VZ * cos_y - VX * sin_y
+        y2 = VY * cos_x - z1 * sin_x
+        z2 = z1 * cos_x + VY * sin_x
+
         # Perspective Projection
-        dist = 128
-        focal = 128
         w = z2 + dist
-        if w == 0: w = 1
-        xp = (x1 * focal) / w
-        yp = (y2 * focal) / w
-        
-        projected_2d.append((xp + 32, yp + 32))
+        w = np.where(w == 0, 1, w)
+        xp = x1 * focal / w
+        yp = y2 * focal / w
+        projected_2d = np.stack([xp + 32, yp + 32], axis=1)
 
-    if not os.path.exists(ppm_path):
+    parsed = _read_mask(ppm_path)
+    if parsed is None:
         return None
+    mask, width, height = parsed
 
-    with open(ppm_path, 'r') as f:
-        lines = f.readlines()
-    
-    if len(lines) < 3: return None
-    
-    # Handle PPM comments if present, though TB doesn't generate them
-    # Basic robust header parsing
-    header_idx = 0
-    while lines[header_idx].strip().startswith('#'): header_idx += 1
-    if lines[header_idx].strip() != 'P1': 
-        # try next line
-        header_idx += 1
-    
-    # Dimensions usually after P1
-    dims_idx = header_idx + 1
-    while lines[dims_idx].strip().startswith('#'): dims_idx += 1
-    
-    dims = lines[dims_idx].split()
-    width, height = int(dims[0]), int(dims[1])
-    
-    pixels = []
-    # Read data
-    for line in lines[dims_idx+1:]:
-        if line.strip().startswith('#'): continue
-        pixels.extend(map(int, line.split()))
-        
     scale = 8
-    # Dark grey background from reference image
-    img = Image.new('RGB', (width * scale, height * scale), (40, 40, 40))
+    # Palette frame: index 0 is the dark grey background
+    img = _new_frame((width * scale, height * scale))
     draw = ImageDraw.Draw(img)
     
     # Draw reference wireframe
-    ref_color = (100, 100, 100) # Draw expected wireframe in grey
-    for e in edges:
-        p1, p2 = projected_2d[e[0]], projected_2d[e[1]]
-        draw.line([p1[0]*scale, p1[1]*scale, p2[0]*scale, p2[1]*scale], fill=ref_color, width=1)
+    # Gather all 1024 edge segments with one fancy-index + scale multiply;
+    # the draw loop then only pays the PIL call itself per edge.
+    ref_color = 1  # palette: wireframe grey
+    segments = np.hstack([projected_2d[EDGES[:, 0]], projected_2d[EDGES[:, 1]]]) * scale
+    for seg in segments.tolist():
+        draw.line(seg, fill=ref_color, width=1)
         
-    # Draw GPU vertices (from simulation output)
-    for y in range(height):
-        for x in range(width):
-            if pixels[y * width + x] == 1:
-                cx, cy = x * scale, y * scale
-                # Reduced point size for high density
-                r = 1.0
-                draw.ellipse([cx-r, cy-r, cx+r, cy+r], fill=(255, 255, 255))
-                # Faint halo
-                rh = 3
-                draw.ellipse([cx-rh, cy-rh, cx+rh, cy+rh], outline=(255, 255, 255, 40))
+    # Draw GPU vertices (only the set pixels; np.nonzero scans at C speed)
+    ys, xs = np.nonzero(mask)
+    for cy, cx in zip((ys * scale).tolist(), (xs * scale).tolist()):
+        # Small stamp: point size kept low for high vertex density
+        img.paste(2, (cx - STAMP_RADIUS, cy - STAMP_RADIUS), STAMP_MASK)
     
     return img
 
+def render_frame_bytes(ppm_path, cos_r, sin_r):
+    # Pool worker entry point: encode the frame to PNG bytes for pickling
+    img = render_frame(ppm_path, cos_r, sin_r)
+    if img is None:
+        return None
+    buf = BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+def _render_star(args):
+    # pool.imap takes a single argument; unpack the job tuple
+    return render_frame_bytes(*args)
+
 def create_animation(ppm_pattern, output_gif):
     ppm_files = sorted(glob.glob(ppm_pattern))
     if not ppm_files:
@@ -145,32 +234,43 @@ def create_animation(ppm_pattern, output_gif):
         return
 
     print(f"Processing {len(ppm_files)} frames...")
-    frames = []
-    for i, ppm in enumerate(ppm_files):
-        # Determine total frames context. If single frame file, assume 48 for rotation logic
-        total = 48 if len(ppm_files) == 1 else len(ppm_files)
-        img = render_frame(ppm, i, total)
-        if img:
-            frames.append(img)
-    
-    if not frames:
-        print("No frames processed successfully.")
-        return
+    # One vectorized trig evaluation covers the whole animation
+    angles = -np.radians(np.arange(len(ppm_files)) * 6.0)
+    cos_arr, sin_arr = np.cos(angles), np.sin(angles)
+    jobs = [(ppm, cos_arr[i], sin_arr[i]) for i, ppm in enumerate(ppm_files)]
+    # Frames are independent: render them across all cores and stream each
+    # one straight into the encoder as it arrives (imap preserves order),
+    # so memory stays flat at about one frame regardless of length.
+    with mp.Pool() as pool:
+        stream = (Image.open(BytesIO(b))
+                  for b in pool.imap(_render_star, jobs) if b)
+        first = next(stream, None)
+        if first is None:
+            print("No frames processed successfully.")
+            return
+
+        if len(ppm_files) == 1:
+            first.save(output_gif)
+            print(f"Image saved to {output_gif}")
+            return
 
-    if len(frames) == 1:
-        frames[0].save(output_gif)
-        print(f"Image saved to {output_gif}")
-    else:
         # Save as animated GIF (24 fps -> 41ms per frame)
-        frames[0].save(
-            output_gif,
-            save_all=True,
-            append_images=frames[1:],
-            optimize=False,
-            duration=41,
-            loop=0
-        )
-        print(f"Animation saved to {output_gif}")
+        if imageio is not None:
+            with imageio.get_writer(output_gif, mode='I', duration=41, loop=0) as w:
+                w.append_data(np.asarray(first.convert('RGB')))
+                for img in stream:
+                    w.append_data(np.asarray(img.convert('RGB')))
+        else:
+            # Pillow pulls append_images lazily, encoding frame by frame
+            first.save(
+                output_gif,
+                save_all=True,
+                append_images=stream,
+                optimize=False,
+                duration=41,
+                loop=0
+            )
+    print(f"Animation saved to {output_gif}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -1,6 +1,22 @@
 import sys
+import numpy as np
 from PIL import Image, ImageDraw
 
+# Precomputed RGBA "dot + glow" stamp (11x11): inner 7x7 white disc with a
+# faint halo ring. Built once at import so the per-pixel path is a pure
+# NumPy blend instead of two draw.ellipse calls per set pixel.
+STAMP_RADIUS = 5
+
+def _build_stamp():
+    size = 2 * STAMP_RADIUS + 1
+    stamp = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    d = ImageDraw.Draw(stamp)
+    d.ellipse([0, 0, size - 1, size - 1], outline=(255, 255, 255, 50))
+    d.ellipse([2, 2, size - 3, size - 3], fill=(255, 255, 255, 255))
+    return np.array(stamp, dtype=np.uint8)
+
+STAMP = _build_stamp()
+
 def convert_ppm_to_png(ppm_path, png_path):
     # Cube definition (from testbench)
     vertices = [
@@ -12,55 +28,72 @@ def convert_ppm_to_png(ppm_path, png_path):
         (4, 5), (5, 6), (6, 7), (7, 4), # Front face
         (0, 4), (1, 5), (2, 6), (3, 7)  # Connecting edges
     ]
-    
+
     try:
-        # Read the P1 PPM (ASCII)
-        with open(ppm_path, 'r') as f:
-            lines = f.readlines()
-        
+        # Read the PPM (ASCII P1 or packed-binary P4)
+        with open(ppm_path, 'rb') as f:
+            data = f.read()
+
         # Parse header
+        lines = data.split(b'\n', 2)
         magic = lines[0].strip()
-        if magic != 'P1':
-            print(f"Error: Expected P1 magic number, got {magic}")
+        if magic not in (b'P1', b'P4'):
+            print(f"Error: Expected P1/P4 magic number, got {magic}")
             return
-            
+
         dims = lines[1].strip().split()
         width, height = int(dims[0]), int(dims[1])
-        
-        # Parse data
-        pixels = []
-        for line in lines[2:]:
-            pixels.extend(map(int, line.split()))
-            
+        body = lines[2]
+
+        # Parse data into a (H, W) mask in one pass
+        if magic == b'P4':
+            # Packed-bit binary fast path; each row is padded to a whole byte
+            rows = np.frombuffer(body, dtype=np.uint8).reshape(height, (width + 7) // 8)
+            mask = np.unpackbits(rows, axis=1)[:, :width]
+        else:
+            # P1: drop whitespace at byte level, the '0'/'1' digits remain
+            mask = (np.frombuffer(body.translate(None, b' \t\r\n'),
+                                  dtype=np.uint8) - ord(b'0')).reshape(height, width)
+
         # Scale for output (8x)
         scale = 8
         out_width, out_height = width * scale, height * scale
-        
+
         # Create final high-res image
         img = Image.new('RGB', (out_width, out_height), (10, 10, 15)) # Dark blue-black bg
         draw = ImageDraw.Draw(img)
-        
+
         # 1. Draw wireframe edges (blue-gray reference)
         ref_color = (60, 60, 80)
         for edge in edges:
             v1_idx, v2_idx = edge
             v1 = vertices[v1_idx]
             v2 = vertices[v2_idx]
-            draw.line([v1[0]*scale, v1[1]*scale, v2[0]*scale, v2[1]*scale], 
+            draw.line([v1[0]*scale, v1[1]*scale, v2[0]*scale, v2[1]*scale],
                       fill=ref_color, width=1)
-        
-        # 2. Draw simulation pixels from PPM (Clean white dots)
-        # We draw them as slightly anti-aliased circles to avoid "square" artifacts
-        for y in range(height):
-            for x in range(width):
-                if pixels[y * width + x] == 1:
-                    cx, cy = x * scale, y * scale
-                    # Draw a nice clean dot
-                    draw.ellipse([cx-3, cy-3, cx+3, cy+3], fill=(255, 255, 255))
-                    # Add a subtle glow
-                    draw.ellipse([cx-5, cy-5, cx+5, cy+5], outline=(255, 255, 255, 50))
 
-        img.save(png_path)
+        # 2. Composite simulation pixels from PPM (clean white dots)
+        # Alpha-blend the precomputed stamp at each set pixel with NumPy
+        # slice writes instead of per-pixel ellipse draws.
+        bg = np.array(img, dtype=np.uint8)
+        stamp_rgb = STAMP[:, :, :3].astype(np.uint16)
+        stamp_a = STAMP[:, :, 3:4].astype(np.uint16)
+        ys, xs = np.nonzero(mask)
+        for cy, cx in zip(ys * scale, xs * scale):
+            y0, y1 = cy - STAMP_RADIUS, cy + STAMP_RADIUS + 1
+            x0, x1 = cx - STAMP_RADIUS, cx + STAMP_RADIUS + 1
+            # Clip the stamp against the image borders
+            sy0, sx0 = max(0, -y0), max(0, -x0)
+            sy1 = STAMP.shape[0] - max(0, y1 - out_height)
+            sx1 = STAMP.shape[1] - max(0, x1 - out_width)
+            y0, x0 = max(0, y0), max(0, x0)
+            y1, x1 = min(out_height, y1), min(out_width, x1)
+            region = bg[y0:y1, x0:x1].astype(np.uint16)
+            a = stamp_a[sy0:sy1, sx0:sx1]
+            blended = (stamp_rgb[sy0:sy1, sx0:sx1] * a + region * (255 - a)) // 255
+            bg[y0:y1, x0:x1] = blended.astype(np.uint8)
+
+        Image.fromarray(bg, 'RGB').save(png_path)
         print(f"Successfully rendered clean visualization to {png_path}")
     except Exception as e:
         print(f"Error: {e}")
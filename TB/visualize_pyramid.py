@@ -1,96 +1,165 @@
 import sys
 import math
+import multiprocessing as mp
+from io import BytesIO
+import numpy as np
 from PIL import Image, ImageDraw
 import glob
-import os
-
-def render_frame(ppm_path, frame_idx, total_frames):
-    # 3D vertices (match test_parallel_pyramid.sv)
-    # V0: (-16, -16, -16)
-    # V1: ( 16, -16, -16)
-    # V2: ( 16, -16,  16)
-    # V3: (-16, -16,  16)
-    # V4: (  0,  16,   0) (Apex)
-    vertices3d = [
-        (-16, -16, -16), 
-        ( 16, -16, -16), 
-        ( 16, -16,  16), 
-        (-16, -16,  16),
-        (  0,  16,   0)
-    ]
-    
-    # Pyramid Edges
-    edges = [
-        # Base Square
-        (0, 1), (1, 2), (2, 3), (3, 0),
-        # Side Edges (Base to Apex)
-        (0, 4), (1, 4), (2, 4), (3, 4)
-    ]
-    
-    # 1. Rotate around Y by dynamic angle
-    angle_y = math.radians(frame_idx * (360.0 / total_frames)) if total_frames > 1 else 0
-    cos_y, sin_y = math.cos(angle_y), math.sin(angle_y)
-    
-    # 2. Rotate around X by static 30 degrees
-    angle_x = math.radians(30.0)
-    cos_x, sin_x = math.cos(angle_x), math.sin(angle_x)
-
-    projected_2d = []
-    for x, y, z in vertices3d:
-        # Y-axis rotation
-        x1 = x * cos_y + z * sin_y
-        z1 = z * cos_y - x * sin_y
-        
-        # X-axis rotation
-        y2 = y * cos_x - z1 * sin_x
-        z2 = z1 * cos_x + y * sin_x
-        
-        # Perspective Projection
-        dist = 128
-        focal = 128
-        w = z2 + dist
-        if w == 0: w = 1
-        xp = (x1 * focal) / w
-        yp = (y2 * focal) / w
-        
-        projected_2d.append((xp + 32, yp + 32))
 
-    if not os.path.exists(ppm_path):
+# Optional: imageio delegates GIF muxing to FFmpeg/pyav with threaded
+# encoding; fall back to Pillow's single-threaded writer when absent.
+try:
+    import imageio
+except ImportError:
+    imageio = None
+
+# 3D vertices (match test_parallel_pyramid.sv)
+# V0: (-16, -16, -16)
+# V1: ( 16, -16, -16)
+# V2: ( 16, -16,  16)
+# V3: (-16, -16,  16)
+# V4: (  0,  16,   0) (Apex)
+VERTICES3D = np.array([
+    (-16, -16, -16),
+    ( 16, -16, -16),
+    ( 16, -16,  16),
+    (-16, -16,  16),
+    (  0,  16,   0)
+], dtype=np.float64)
+
+# Pyramid Edges
+EDGES = np.array([
+    # Base Square
+    (0, 1), (1, 2), (2, 3), (3, 0),
+    # Side Edges (Base to Apex)
+    (0, 4), (1, 4), (2, 4), (3, 4)
+])
+
+# The X rotation is a fixed 30 degrees, so its matrix never changes per frame
+_cos_x, _sin_x = math.cos(math.radians(30.0)), math.sin(math.radians(30.0))
+RX = np.array([[1, 0, 0], [0, _cos_x, -_sin_x], [0, _sin_x, _cos_x]])
+
+# Tiny fixed palette lets frames be drawn in 'P' mode, so the GIF writer
+# copies them through without palette quantization.
+# 0: background, 1: wireframe reference, 2: rendered pixels
+PALETTE = [40, 40, 40, 100, 100, 100, 255, 255, 255] + [0, 0, 0] * 253
+
+# Dot + halo stamp rasterized once at import: render_frame pastes palette
+# index 2 through this mask instead of issuing two ellipse draws per pixel.
+STAMP_RADIUS = 6
+
+def _build_stamp_mask():
+    size = 2 * STAMP_RADIUS + 1
+    m = Image.new('1', (size, size), 0)
+    d = ImageDraw.Draw(m)
+    d.ellipse([0, 0, size - 1, size - 1], outline=1)  # faint halo ring
+    d.ellipse([2, 2, size - 3, size - 3], fill=1)     # solid dot
+    return m
+
+STAMP_MASK = _build_stamp_mask()
+
+# Cached (header_bytes, width, height): every frame of a run shares the same
+# header, so after the first parse we only prefix-match the raw bytes.
+_header_cache = None
+
+def _read_mask(ppm_path):
+    global _header_cache
+    # A missing frame is reported by open() itself -- no separate stat call
+    try:
+        with open(ppm_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if _header_cache and data.startswith(_header_cache[0]):
+        header, width, height, magic = _header_cache
+    else:
+        lines = data.split(b'\n', 2)
+        if len(lines) < 3:
+            return None
+        magic = lines[0].strip()
+        dims = lines[1].split()
+        width, height = int(dims[0]), int(dims[1])
+        header = data[:len(data) - len(lines[2])]
+        _header_cache = (header, width, height, magic)
+    body = data[len(header):]
+    if magic == b'P4':
+        # Packed-bit binary fast path; each row is padded to a whole byte
+        rows = np.frombuffer(body, dtype=np.uint8).reshape(height, (width + 7) // 8)
+        bits = np.unpackbits(rows, axis=1)[:, :width]
+        return bits, width, height
+    # P1 data is pure '0'/'1' digits: drop whitespace at byte level and
+    # subtract ord('0') -- no tokenization or per-value int() casts.
+    bits = np.frombuffer(body.translate(None, b' \t\r\n'),
+                         dtype=np.uint8) - ord(b'0')
+    return bits.reshape(height, width), width, height
+
+# Pristine background frame, built once per frame size: Image.copy is a
+# single C memcpy, cheaper than re-filling a fresh Image.new every frame.
+_bg_template = None
+
+def _new_frame(size):
+    global _bg_template
+    if _bg_template is None or _bg_template.size != size:
+        img = Image.new('P', size, 0)
+        img.putpalette(PALETTE)
+        _bg_template = img
+    return _bg_template.copy()
+
+def render_frame(ppm_path, cos_y, sin_y):
+    # The Y-rotation trig arrives precomputed from create_animation (one
+    # vectorized np.cos/np.sin per run); the static 30-degree X rotation
+    # is the module-level RX matrix
+    # Rotate all vertices in one matmul, then project with vector ops
+    Ry = np.array([[cos_y, 0, sin_y], [0, 1, 0], [-sin_y, 0, cos_y]])
+    P = VERTICES3D @ Ry.T @ RX.T
+
+    # Perspective Projection
+    dist = 128
+    focal = 128
+    w = P[:, 2] + dist
+    w = np.where(w == 0, 1, w)
+    xp = P[:, 0] * focal / w
+    yp = P[:, 1] * focal / w
+    projected_2d = np.stack([xp + 32, yp + 32], axis=1)
+
+    parsed = _read_mask(ppm_path)
+    if parsed is None:
         return None
+    mask, width, height = parsed
 
-    with open(ppm_path, 'r') as f:
-        lines = f.readlines()
-    
-    if len(lines) < 3: return None
-    
-    dims = lines[1].split()
-    width, height = int(dims[0]), int(dims[1])
-    pixels = []
-    for line in lines[2:]:
-        pixels.extend(map(int, line.split()))
-        
     scale = 8
-    # Dark grey background from reference image
-    img = Image.new('RGB', (width * scale, height * scale), (40, 40, 40))
+    # Palette frame: index 0 is the dark grey background
+    img = _new_frame((width * scale, height * scale))
     draw = ImageDraw.Draw(img)
     
-    # Draw reference wireframe
-    ref_color = (100, 100, 100) # Draw expected wireframe in grey
-    for e in edges:
-        p1, p2 = projected_2d[e[0]], projected_2d[e[1]]
-        draw.line([p1[0]*scale, p1[1]*scale, p2[0]*scale, p2[1]*scale], fill=ref_color, width=2)
+    # Draw reference wireframe: gather all scaled segments with one
+    # fancy-index instead of per-edge lookups and multiplies
+    ref_color = 1  # palette: wireframe grey
+    segments = np.hstack([projected_2d[EDGES[:, 0]], projected_2d[EDGES[:, 1]]]) * scale
+    for seg in segments.tolist():
+        draw.line(seg, fill=ref_color, width=2)
         
-    # Draw GPU vertices (from simulation output)
-    for y in range(height):
-        for x in range(width):
-            if pixels[y * width + x] == 1:
-                cx, cy = x * scale, y * scale
-                # Bright white highlights for rendered pixels
-                draw.ellipse([cx-4, cy-4, cx+4, cy+4], fill=(255, 255, 255))
-                draw.ellipse([cx-6, cy-6, cx+6, cy+6], outline=(255, 255, 255, 80))
+    # Draw GPU vertices (only the set pixels; np.nonzero scans at C speed)
+    ys, xs = np.nonzero(mask)
+    for cy, cx in zip((ys * scale).tolist(), (xs * scale).tolist()):
+        # Bright white highlights for rendered pixels
+        img.paste(2, (cx - STAMP_RADIUS, cy - STAMP_RADIUS), STAMP_MASK)
     
     return img
 
+def render_frame_bytes(ppm_path, cos_y, sin_y):
+    # Pool worker entry point: encode the frame to PNG bytes for pickling
+    img = render_frame(ppm_path, cos_y, sin_y)
+    if img is None:
+        return None
+    buf = BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+def _render_star(args):
+    # pool.imap takes a single argument; unpack the job tuple
+    return render_frame_bytes(*args)
+
 def create_animation(ppm_pattern, output_gif):
     ppm_files = sorted(glob.glob(ppm_pattern))
     if not ppm_files:
@@ -98,32 +167,45 @@ def create_animation(ppm_pattern, output_gif):
         return
 
     print(f"Processing {len(ppm_files)} frames...")
-    frames = []
-    for i, ppm in enumerate(ppm_files):
-        # Determine total frames context. If single frame file, assume 48 for rotation logic
-        total = 48 if len(ppm_files) == 1 else len(ppm_files)
-        img = render_frame(ppm, i, total)
-        if img:
-            frames.append(img)
-    
-    if not frames:
-        print("No frames processed successfully.")
-        return
+    # Determine total frames context. If single frame file, assume 48 for rotation logic
+    total = 48 if len(ppm_files) == 1 else len(ppm_files)
+    # One vectorized trig evaluation covers the whole animation
+    angles = np.arange(len(ppm_files)) * (2.0 * np.pi / total)
+    cos_y_arr, sin_y_arr = np.cos(angles), np.sin(angles)
+    jobs = [(ppm, cos_y_arr[i], sin_y_arr[i]) for i, ppm in enumerate(ppm_files)]
+    # Frames are independent: render them across all cores and stream each
+    # one straight into the encoder as it arrives (imap preserves order),
+    # so memory stays flat at about one frame regardless of length.
+    with mp.Pool() as pool:
+        stream = (Image.open(BytesIO(b))
+                  for b in pool.imap(_render_star, jobs) if b)
+        first = next(stream, None)
+        if first is None:
+            print("No frames processed successfully.")
+            return
+
+        if len(ppm_files) == 1:
+            first.save(output_gif)
+            print(f"Image saved to {output_gif}")
+            return
 
-    if len(frames) == 1:
-        frames[0].save(output_gif)
-        print(f"Image saved to {output_gif}")
-    else:
         # Save as animated GIF (24 fps -> 41ms per frame)
-        frames[0].save(
-            output_gif,
-            save_all=True,
-            append_images=frames[1:],
-            optimize=False,
-            duration=41,
-            loop=0
-        )
-        print(f"Animation saved to {output_gif}")
+        if imageio is not None:
+            with imageio.get_writer(output_gif, mode='I', duration=41, loop=0) as w:
+                w.append_data(np.asarray(first.convert('RGB')))
+                for img in stream:
+                    w.append_data(np.asarray(img.convert('RGB')))
+        else:
+            # Pillow pulls append_images lazily, encoding frame by frame
+            first.save(
+                output_gif,
+                save_all=True,
+                append_images=stream,
+                optimize=False,
+                duration=41,
+                loop=0
+            )
+    print(f"Animation saved to {output_gif}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
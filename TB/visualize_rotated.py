@@ -1,11 +1,81 @@
 import sys
 import math
+import multiprocessing as mp
+from io import BytesIO
+import numpy as np
 from PIL import Image, ImageDraw
 
 import glob
 import os
 
-def render_frame(ppm_path, frame_idx, total_frames):
+# Optional: imageio delegates GIF muxing to FFmpeg/pyav with threaded
+# encoding; fall back to Pillow's single-threaded writer when absent.
+try:
+    import imageio
+except ImportError:
+    imageio = None
+
+# Tiny fixed palette lets frames be drawn in 'P' mode, so the GIF writer
+# copies them through without palette quantization.
+# 0: background, 1: wireframe reference, 2: rendered pixels
+PALETTE = [5, 5, 10, 60, 60, 100, 255, 255, 255] + [0, 0, 0] * 253
+
+# Dot + halo stamp rasterized once at import: render_frame pastes palette
+# index 2 through this mask instead of issuing two ellipse draws per pixel.
+STAMP_RADIUS = 5
+
+def _build_stamp_mask():
+    size = 2 * STAMP_RADIUS + 1
+    m = Image.new('1', (size, size), 0)
+    d = ImageDraw.Draw(m)
+    d.ellipse([0, 0, size - 1, size - 1], outline=1)  # faint halo ring
+    d.ellipse([2, 2, size - 3, size - 3], fill=1)     # solid dot
+    return m
+
+STAMP_MASK = _build_stamp_mask()
+
+# Cached (header_bytes, width, height): every frame of a run shares the same
+# header, so after the first parse we only prefix-match the raw bytes.
+_header_cache = None
+
+def _read_mask(ppm_path):
+    global _header_cache
+    with open(ppm_path, 'rb') as f:
+        data = f.read()
+    if _header_cache and data.startswith(_header_cache[0]):
+        header, width, height, magic = _header_cache
+    else:
+        lines = data.split(b'\n', 2)
+        magic = lines[0].strip()
+        dims = lines[1].split()
+        width, height = int(dims[0]), int(dims[1])
+        header = data[:len(data) - len(lines[2])]
+        _header_cache = (header, width, height, magic)
+    body = data[len(header):]
+    if magic == b'P4':
+        # Packed-bit binary fast path; each row is padded to a whole byte
+        rows = np.frombuffer(body, dtype=np.uint8).reshape(height, (width + 7) // 8)
+        bits = np.unpackbits(rows, axis=1)[:, :width]
+        return bits, width, height
+    # P1 data is pure '0'/'1' digits: drop whitespace at byte level and
+    # subtract ord('0') -- no tokenization or per-value int() casts.
+    bits = np.frombuffer(body.translate(None, b' \t\r\n'),
+                         dtype=np.uint8) - ord(b'0')
+    return bits.reshape(height, width), width, height
+
+# Pristine background frame, built once per frame size: Image.copy is a
+# single C memcpy, cheaper than re-filling a fresh Image.new every frame.
+_bg_template = None
+
+def _new_frame(size):
+    global _bg_template
+    if _bg_template is None or _bg_template.size != size:
+        img = Image.new('P', size, 0)
+        img.putpalette(PALETTE)
+        _bg_template = img
+    return _bg_template.copy()
+
+def render_frame(ppm_path, cos_th, sin_th):
     # 3D vertices
     vertices3d = [
         (-16, -16, -16), (16, -16, -16), (16, 16, -16), (-16, 16, -16),
@@ -17,43 +87,45 @@ def render_frame(ppm_path, frame_idx, total_frames):
         (0, 4), (1, 5), (2, 6), (3, 7)
     ]
     
-    # Rotation angle matching Verilog (frame * (360 / total_frames))
-    angle = math.radians(frame_idx * (360.0 / total_frames))
-    cos_th, sin_th = math.cos(angle), math.sin(angle)
+    # Rotation trig matching Verilog (frame * (360 / total_frames)),
+    # precomputed for the whole animation in create_animation
     rotated_2d = []
     for x, y, z in vertices3d:
         xr = x * cos_th + z * sin_th
         rotated_2d.append((xr + 32, y + 32))
 
-    with open(ppm_path, 'r') as f:
-        lines = f.readlines()
-    
-    dims = lines[1].split()
-    width, height = int(dims[0]), int(dims[1])
-    pixels = []
-    for line in lines[2:]:
-        pixels.extend(map(int, line.split()))
-        
+    mask, width, height = _read_mask(ppm_path)
+
     scale = 8
-    img = Image.new('RGB', (width * scale, height * scale), (5, 5, 10))
+    # Palette frame: index 0 is the dark blue-black background
+    img = _new_frame((width * scale, height * scale))
     draw = ImageDraw.Draw(img)
     
     # Draw reference wireframe
-    ref_color = (60, 60, 100)
+    ref_color = 1  # palette: wireframe blue-grey
     for e in edges:
         p1, p2 = rotated_2d[e[0]], rotated_2d[e[1]]
         draw.line([p1[0]*scale, p1[1]*scale, p2[0]*scale, p2[1]*scale], fill=ref_color, width=1)
         
-    # Draw GPU vertices
-    for y in range(height):
-        for x in range(width):
-            if pixels[y * width + x] == 1:
-                cx, cy = x * scale, y * scale
-                draw.ellipse([cx-3, cy-3, cx+3, cy+3], fill=(255, 255, 255))
-                draw.ellipse([cx-5, cy-5, cx+5, cy+5], outline=(255, 255, 255, 50))
+    # Draw GPU vertices; empty frames skip the coordinate walk entirely
+    if mask.any():
+        for cy, cx in (np.argwhere(mask) * scale).tolist():
+            # White dot + halo from the precomputed stamp
+            img.paste(2, (cx - STAMP_RADIUS, cy - STAMP_RADIUS), STAMP_MASK)
     
     return img
 
+def render_frame_bytes(ppm_path, cos_th, sin_th):
+    # Pool worker entry point: encode the frame to PNG bytes for pickling
+    img = render_frame(ppm_path, cos_th, sin_th)
+    buf = BytesIO()
+    img.save(buf, 'PNG')
+    return buf.getvalue()
+
+def _render_star(args):
+    # pool.imap takes a single argument; unpack the job tuple
+    return render_frame_bytes(*args)
+
 def create_animation(ppm_pattern, output_gif):
     ppm_files = sorted(glob.glob(ppm_pattern))
     if not ppm_files:
@@ -61,25 +133,44 @@ def create_animation(ppm_pattern, output_gif):
         return
 
     print(f"Processing {len(ppm_files)} frames...")
-    frames = []
-    for i, ppm in enumerate(ppm_files):
-        frames.append(render_frame(ppm, i, len(ppm_files)))
-    
-    # Save as animated GIF (24 fps -> 41ms per frame)
-    frames[0].save(
-        output_gif,
-        save_all=True,
-        append_images=frames[1:],
-        optimize=False,
-        duration=41,
-        loop=0
-    )
+    # One vectorized trig evaluation covers the whole animation
+    angles = np.arange(len(ppm_files)) * (2.0 * np.pi / len(ppm_files))
+    cos_arr, sin_arr = np.cos(angles), np.sin(angles)
+    jobs = [(ppm, cos_arr[i], sin_arr[i]) for i, ppm in enumerate(ppm_files)]
+    # Frames are independent: render them across all cores and stream each
+    # one straight into the encoder as it arrives (imap preserves order),
+    # so memory stays flat at about one frame regardless of length.
+    with mp.Pool() as pool:
+        stream = (Image.open(BytesIO(b))
+                  for b in pool.imap(_render_star, jobs))
+        first = next(stream, None)
+        if first is None:
+            print("No frames processed successfully.")
+            return
+
+        # Save as animated GIF (24 fps -> 41ms per frame)
+        if imageio is not None:
+            with imageio.get_writer(output_gif, mode='I', duration=41, loop=0) as w:
+                w.append_data(np.asarray(first.convert('RGB')))
+                for img in stream:
+                    w.append_data(np.asarray(img.convert('RGB')))
+        else:
+            # Pillow pulls append_images lazily, encoding frame by frame
+            first.save(
+                output_gif,
+                save_all=True,
+                append_images=stream,
+                optimize=False,
+                duration=41,
+                loop=0
+            )
     print(f"Animation saved to {output_gif}")
 
 if __name__ == "__main__":
     if "*" in sys.argv[1]:
         create_animation(sys.argv[1], sys.argv[2])
     else:
-        # Fallback to single frame
-        img = render_frame(sys.argv[1], 6, 48) # Default 45 deg if single
+        # Fallback to single frame (default 45 deg)
+        angle = math.radians(45.0)
+        img = render_frame(sys.argv[1], math.cos(angle), math.sin(angle))
         img.save(sys.argv[2])